@@ -0,0 +1,201 @@
+# Copyright (C) 2017 Tom Hartill
+#
+# Benchmark.py - Measures the cost of icon previews used by ThemedIconChooser.
+#
+# ThemedIconChooser is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation; either version 3 of the License, or (at your option) any
+# later version.
+#
+# ThemedIconChooser is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# ThemedIconChooser; if not, see http://www.gnu.org/licenses/.
+#
+# An up to date version can be found at:
+# https://github.com/Tomha/python-gtk-themed-icon-chooser
+
+import os
+import subprocess
+import sys
+import time
+
+import ThemedIconChooser
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib, Gtk, Pango
+
+# Cache used by drawn previews, as IconChooserDialog uses one, see main.
+_pixbuf_cache = None
+
+
+def create_box_preview(name, size):
+    """Create a preview the way it was done before _IconPreview drew itself.
+
+    The image is loaded by GTK when the preview is first measured.
+
+    :param name: Name of the icon to preview.
+    :param size: Size to make the icon within the preview.
+    :return: Gtk.Box containing an image and label.
+    """
+    box = Gtk.Box()
+    box.set_orientation(Gtk.Orientation.VERTICAL)
+    box.set_spacing(2)
+
+    icon = Gtk.Image.new_from_icon_name(name, Gtk.IconSize.DIALOG)
+    icon.set_pixel_size(size)
+    icon.set_tooltip_text(name)
+
+    label = Gtk.Label(name.replace('-', ' ').replace('_', ' '))
+    label.set_justify(Gtk.Justification.CENTER)
+    label.set_lines(3)
+    label.set_line_wrap(True)
+    label.set_line_wrap_mode(Pango.WrapMode.WORD_CHAR)
+    label.set_max_width_chars(8)
+    label.set_ellipsize(Pango.EllipsizeMode.END)
+
+    box.pack_start(icon, False, False, 0)
+    box.pack_start(label, False, False, 0)
+    return box
+
+
+def create_drawn_preview(name, size):
+    """Create a preview as IconChooserDialog does now.
+
+    The dialog loads images asynchronously, so here the image is loaded
+    directly instead. Both kinds of preview are created and shown within the
+    same measurement, so each is timed including loading its image.
+
+    :param name: Name of the icon to preview.
+    :param size: Size to make the icon within the preview.
+    :return: ThemedIconChooser._IconPreview.
+    """
+    preview = ThemedIconChooser._IconPreview(name, size)
+    scale = preview.get_scale_factor()
+    preview.set_pixbuf(_pixbuf_cache.load(name, size, scale), scale)
+    return preview
+
+
+def count_widgets(widget):
+    """Count a widget and all of its descendants.
+
+    :param widget: Gtk.Widget to count from.
+    :return: Number of widgets.
+    """
+    count = 1
+    if isinstance(widget, Gtk.Container):
+        for child in widget.get_children():
+            count += count_widgets(child)
+    return count
+
+
+def get_rss():
+    """Get the resident memory of this process, where available.
+
+    This includes memory used by GTK, Pango and image data, not just Python.
+
+    :return: Resident memory in KiB, or None if unknown.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def wait_for_paint(window):
+    """Run the main loop until a window has been laid out and painted.
+
+    :param window: Realized Gtk.Window to wait for.
+    :return: None
+    """
+    loop = GLib.MainLoop()
+    frame_clock = window.get_frame_clock()
+    handler = frame_clock.connect("after-paint", lambda clock: loop.quit())
+    window.queue_draw()
+    loop.run()
+    frame_clock.disconnect(handler)
+
+
+def measure(create_preview, icon_names, size):
+    """Measure creating, showing and painting a preview for each icon.
+
+    :param create_preview: Function taking an icon name and size.
+    :param icon_names: List of icon names to preview.
+    :param size: Size to make icons within previews.
+    :return: Dict of measurements.
+    """
+    window = Gtk.OffscreenWindow()
+    flow_box = Gtk.FlowBox()
+    window.add(flow_box)
+    window.show_all()
+    wait_for_paint(window)
+
+    rss_before = get_rss()
+    start = time.perf_counter()
+    for name in icon_names:
+        flow_child = Gtk.FlowBoxChild()
+        flow_child.add(create_preview(name, size))
+        flow_box.insert(flow_child, -1)
+    flow_box.show_all()
+    wait_for_paint(window)
+    show_time = time.perf_counter() - start
+    rss_after = get_rss()
+
+    result = {"widgets": count_widgets(flow_box) - 1,
+              "rss_kib": None,
+              "show_ms": show_time * 1000}
+    if rss_before is not None:
+        result["rss_kib"] = rss_after - rss_before
+    window.destroy()
+    return result
+
+
+def main():
+    """Measure each kind of preview in a process of its own.
+
+    Usage: Benchmark.py [count] [box|drawn]
+
+    Without a kind of preview, both are measured, each in a new process so
+    that neither benefits from memory or caches left by the other.
+
+    :return: None
+    """
+    global _pixbuf_cache
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    icon_theme = Gtk.IconTheme.get_default()
+    icon_names = set()
+    for context in icon_theme.list_contexts():
+        icon_names.update(icon_theme.list_icons(context))
+    icon_names = sorted(icon_names)[:count]
+
+    if len(sys.argv) < 3:
+        print("Per 1000 icons ({0} measured):".format(len(icon_names)))
+        sys.stdout.flush()
+        for kind in ("box", "drawn"):
+            subprocess.run([sys.executable, __file__, str(count), kind],
+                           check=True)
+        return
+
+    if sys.argv[2] == "box":
+        label, create_preview = "Box/Image/Label", create_box_preview
+    else:
+        label, create_preview = "Drawn preview", create_drawn_preview
+        _pixbuf_cache = ThemedIconChooser._PixbufCache(icon_theme)
+    result = measure(create_preview, icon_names, 32)
+    scale = 1000 / len(icon_names)
+    print("  {0}:".format(label))
+    print("    widgets:          {0:.0f}".format(result["widgets"] * scale))
+    if result["rss_kib"] is not None:
+        print("    RSS KiB:          {0:.0f}".format(
+            result["rss_kib"] * scale))
+    print("    create+show ms:   {0:.1f}".format(result["show_ms"] * scale))
+
+
+if __name__ == "__main__":
+    main()
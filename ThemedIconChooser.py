@@ -18,12 +18,29 @@
 # An up to date version can be found at:
 # https://github.com/Tomha/python-gtk-themed-icon-chooser
 
+import asyncio
+import atexit
+import json
+import os
 import re
+import weakref
+from collections import deque
 from threading import Thread
 
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import GLib, GObject, Gtk, Pango
+from gi.repository import Gdk, GLib, GObject, Gtk, Pango
+
+# Pseudo-context offered by the dialog to search icons from every context.
+_ALL_CONTEXTS = "(All Contexts)"
+
+# Shared store of recently used and favorite icons, see _get_icon_history.
+_icon_history = None
+# File the icon history is kept in, see set_history_file.
+_icon_history_path = os.path.join(GLib.get_user_data_dir(),
+                                  "ThemedIconChooser", "history.json")
+# Shared model of icons for combo boxes, see _get_shared_icon_store.
+_shared_icon_store = None
 
 
 class IconChooserDialog(Gtk.Dialog):
@@ -38,6 +55,13 @@ class IconChooserDialog(Gtk.Dialog):
     still be show()n from the main thread, which may momentarily block it. This
     can be limited by filtering the available icon selection beforehand.
     """
+    # Milliseconds to wait for typing to pause before filtering icons.
+    filter_delay = 150
+    # Milliseconds to wait for the icon size to settle before resizing icons.
+    zoom_delay = 50
+    # Number of icon previews to create between handling other events.
+    preview_batch_size = 100
+
     def __init__(self):
         super().__init__()
         GLib.threads_init()
@@ -52,6 +76,20 @@ class IconChooserDialog(Gtk.Dialog):
         self._filter_term = ""
         self._selected_icon = ""
         self._use_regex = False
+        self._group_aliases = False
+        self._used_contexts = []
+        self._all_icon_names = None
+        self._searching_all_contexts = False
+        self._icon_names = []
+        self._visible_icons = None
+        self._filter_timeout = None
+        self._filter_generation = 0
+        self._destroyed = False
+        self._pixbuf_cache = None
+        self._zoom_timeout = None
+        # Incremented whenever loaded previews become stale, so that threads
+        #   still creating previews for old results know to stop.
+        self._load_generation = 0
 
         # Widgets start here
 
@@ -87,6 +125,53 @@ class IconChooserDialog(Gtk.Dialog):
         filter_box.pack_start(self._filter_entry, True, True, 0)
         filter_box.pack_start(filter_clear_button, False, False, 0)
 
+        # Icon Size
+
+        icon_size_label = Gtk.Label("Icon Size:")
+        icon_size_label.set_width_chars(11)
+
+        self._icon_size_scale = Gtk.Scale.new_with_range(
+            Gtk.Orientation.HORIZONTAL, 16, 128, 8)
+        self._icon_size_scale.set_digits(0)
+        self._icon_size_scale.set_value_pos(Gtk.PositionType.RIGHT)
+
+        icon_size_box = Gtk.Box()
+        icon_size_box.set_spacing(4)
+        icon_size_box.pack_start(icon_size_label, False, False, 0)
+        icon_size_box.pack_start(self._icon_size_scale, True, True, 0)
+
+        # Recently Used & Favorite Icons
+
+        recent_label = Gtk.Label("Recent:")
+        recent_label.set_width_chars(11)
+
+        self._recent_icon_box = Gtk.FlowBox()
+        # A vertical flow box with one child per line lays out a single row.
+        self._recent_icon_box.set_orientation(Gtk.Orientation.VERTICAL)
+        self._recent_icon_box.set_max_children_per_line(1)
+        self._recent_icon_box.set_column_spacing(8)
+        self._recent_icon_box.set_homogeneous(True)
+
+        recent_scroller = Gtk.ScrolledWindow()
+        recent_scroller.set_policy(Gtk.PolicyType.AUTOMATIC,
+                                   Gtk.PolicyType.NEVER)
+        recent_scroller.add(self._recent_icon_box)
+
+        self._favorite_button = Gtk.ToggleButton()
+        self._favorite_button.set_image(Gtk.Image.new_from_icon_name(
+            "starred", Gtk.IconSize.MENU))
+        self._favorite_button.set_tooltip_text("Favorite the selected icon")
+        self._favorite_button.set_valign(Gtk.Align.CENTER)
+        self._favorite_button.set_sensitive(False)
+
+        self._recent_box = Gtk.Box()
+        self._recent_box.set_spacing(4)
+        self._recent_box.pack_start(recent_label, False, False, 0)
+        self._recent_box.pack_start(recent_scroller, True, True, 0)
+        self._recent_box.pack_start(self._favorite_button, False, False, 0)
+        # Only shown once there are recent or favorite icons to display.
+        self._recent_box.set_no_show_all(True)
+
         # Icon Previews
 
         self._icon_box = Gtk.FlowBox()
@@ -95,6 +180,7 @@ class IconChooserDialog(Gtk.Dialog):
         self._icon_box.set_row_spacing(8)
         self._icon_box.set_homogeneous(True)
         self._icon_box.set_valign(Gtk.Align.START)
+        self._icon_box.set_filter_func(self._is_icon_preview_visible)
 
         self._scroller = Gtk.ScrolledWindow()
         self._scroller.add(self._icon_box)
@@ -123,6 +209,8 @@ class IconChooserDialog(Gtk.Dialog):
         content_box.set_spacing(8)
         content_box.pack_start(icon_context_box, False, False, 0)
         content_box.pack_start(filter_box, False, False, 0)
+        content_box.pack_start(icon_size_box, False, False, 0)
+        content_box.pack_start(self._recent_box, False, False, 0)
         content_box.pack_start(self._icon_box_frame, True, True, 0)
 
         # Dialog Buttons
@@ -133,81 +221,311 @@ class IconChooserDialog(Gtk.Dialog):
 
         # Connect Signals
         self._icon_context_combo.connect("changed", self._on_context_changed)
-        self._filter_entry.connect("changed", self._filter_icons)
+        self._filter_entry.connect("changed", self._on_filter_changed)
         filter_clear_button.connect("clicked", lambda button:
                                     self._filter_entry.set_text(""))
         self._icon_box.connect("selected-children-changed",
                               self._on_icon_selected)
-
-    def _create_icon_previews(self, icon_name_list, icon_size):
-        """Create icon previews to be placed in the dialog's icon box.
-        
-        Intended to be run in new thread. This only creates previews and adds
-        them to the icon flow box, but it will not show()/display them. This is
-        done by calling _display_icon_previews, which should be done in the
-        main thread via GLib.idle_add.
-        
-        :param icon_name_list: List of icon names to create previews for.
-        :param icon_size: Size to make icons within previews.
-        :return: None
+        self._recent_icon_box.connect("selected-children-changed",
+                                      self._on_icon_selected)
+        self._favorite_button.connect("toggled", self._on_favorite_toggled)
+        self._icon_size_scale.connect("value-changed",
+                                      self._on_icon_size_changed)
+        self.connect("destroy", self._on_destroy)
+        self.connect("notify::scale-factor", self._on_scale_factor_changed)
+
+    def _create_icon_preview(self, icon_name, aliases=(), wait=False):
+        """Create a flow box child containing a preview of an icon.
+
+        The preview is made at the current icon size.
+
+        :param icon_name: Name of the icon to preview.
+        :param aliases: List of other names of the same icon image, which the
+            preview keeps, so that names found later can be added to it.
+        :param wait: Whether to load the icon now, rather than asynchronously.
+        :return: Gtk.FlowBoxChild containing the preview.
         """
-        for icon in icon_name_list:
-            flow_child = Gtk.FlowBoxChild()
-            flow_child.add(_IconPreview(icon, icon_size))
-            flow_child.connect("activate", self._on_icon_preview_selected)
-            GLib.idle_add(self._icon_box.insert, flow_child, -1)
-        GLib.idle_add(self._display_icon_previews)
-
-    def _display_icon_previews(self):
-        """Display icons and clean up after _create_icon_previews is run.
+        preview = _IconPreview(icon_name, self._icon_size, aliases)
+        self._load_icon(preview, wait)
+        flow_child = Gtk.FlowBoxChild()
+        flow_child.add(preview)
+        flow_child.connect("activate", self._on_icon_preview_selected)
+        return flow_child
+
+    def _add_icon_previews(self, icon_name_list, start, icon_groups,
+                           generation, show):
+        """Create and insert a batch of icon previews, then schedule the next.
+
+        Must be run from the main thread, via GLib.idle_add. Icons are looked
+        up in the theme as previews are created, which GTK only allows from
+        the main thread, so previews are created in batches between handling
+        other events. Their images are loaded asynchronously.
+
+        If aliases are grouped, only the first name of each image is previewed,
+        and later names are added to the aliases of its preview.
+
+        Unless shown as they are inserted, the previews are displayed by
+        _display_icon_previews once all have been created. Creation stops
+        early if the previews become stale before finishing.
+
+        :param icon_name_list: List of icon names to preview, in order.
+        :param start: Index in icon_name_list of the first icon of this batch.
+        :param icon_groups: Dict of image file to the list of aliases of the
+            icon previewed for it, shared between batches.
+        :param generation: Load generation the previews are created for.
+        :param show: Whether to show each batch as soon as it is inserted.
+        :return: False, so that this is not repeated by GLib.idle_add.
+        """
+        if generation != self._load_generation:
+            return False
+        end = start + self.preview_batch_size
+        for icon in icon_name_list[start:end]:
+            aliases = []
+            if self._group_aliases:
+                icon_file = _get_icon_file(self._icon_theme.lookup_icon(
+                    icon, self._icon_size, 0))
+                if icon_file in icon_groups:
+                    icon_groups[icon_file].append(icon)
+                    continue
+                if icon_file is not None:
+                    icon_groups[icon_file] = aliases
+            flow_child = self._create_icon_preview(icon, aliases)
+            self._icon_box.insert(flow_child, -1)
+            if show:
+                flow_child.show_all()
+        if end < len(icon_name_list):
+            GLib.idle_add(self._add_icon_previews, icon_name_list, end,
+                          icon_groups, generation, show)
+        elif not show:
+            self._display_icon_previews(generation)
+        return False
+
+    def _display_icon_previews(self, generation):
+        """Display icons and clean up once _add_icon_previews has finished.
 
         WARNING: This must be run from the main thread, however show_all can
         take a noticeable amount of time, so the dialog will freeze momentarily
         as this runs if there are many icons to display. This is not avoidable
         to my knowledge.
         
+        :param generation: Load generation the previews were created for.
         :return: None
         """
+        if generation != self._load_generation:
+            return
         self._icon_box_frame.remove(self._icon_box_frame.get_children()[0])
         self._icon_box_frame.add(self._scroller)
         self._spinner.stop()
         self._scroller.show_all()
+        self._icon_size_scale.set_sensitive(True)
 
+        # Previews not matching the filter term stay hidden by the filter func.
+        if self._visible_icons is not None:
+            # Aliases found after a preview was inserted may match the term.
+            self._icon_box.invalidate_filter()
+        self._icon_box.show_all()
         if self._filter_entry.get_text():
-            self._filter_icons(self._filter_entry)
             self._filter_entry.set_position(len(self._filter_entry.get_text()))
-        else:
-            self._icon_box.show_all()
 
         self._icon_context_combo.set_sensitive(True)
 
-    def _filter_icons(self, entry):
-        """Filter icons based on filter term, used when filter term changes.
+    def _load_icon(self, preview, wait=False):
+        """Load the image of a preview at its icon size.
+
+        :param preview: _IconPreview to load the image of.
+        :param wait: Whether to load the icon now, rather than asynchronously.
+        :return: None
+        """
+        size = preview.get_icon_size()
+        scale = self.get_scale_factor()
+        if wait:
+            preview.set_pixbuf(self._pixbuf_cache.load(preview.get_name(),
+                                                       size, scale), scale)
+        else:
+            self._pixbuf_cache.load_async(preview.get_name(), size, scale,
+                                          self._on_icon_loaded, preview, size,
+                                          scale)
+
+    def _on_icon_loaded(self, pixbuf, preview, size, scale):
+        """Give a preview the image loaded for it, unless since resized.
+
+        :param pixbuf: GdkPixbuf.Pixbuf of the icon, or None if not loaded.
+        :param preview: _IconPreview the image was loaded for.
+        :param size: Size the icon was loaded at.
+        :param scale: Scale factor the icon was loaded for.
+        :return: None
+        """
+        if preview.get_icon_size() == size and \
+                self.get_scale_factor() == scale:
+            preview.set_pixbuf(pixbuf, scale)
+
+    def _search_all_contexts(self):
+        """Search icons from all contexts, streaming matches into the icon box.
+
+        Matching is done against icon names only, so previews are never created
+        for icons which do not match. Matches are displayed best first, as soon
+        as each preview is created. Nothing is displayed without a filter term.
+
+        :return: None
+        """
+        self._ok_button.set_sensitive(False)
+        self._selected_icon = None
+        self._load_generation += 1
+        self._pixbuf_cache.cancel()
+        # Search results are never filtered further.
+        self._filter_generation += 1
+        self._visible_icons = None
+
+        for child in self._icon_box.get_children():
+            child.destroy()
+
+        if not self._filter_term:
+            return
+
+        if self._all_icon_names is None:
+            icon_names = set()
+            for context in self._used_contexts:
+                icon_names.update(self._icon_theme.list_icons(context))
+            self._all_icon_names = list(icon_names)
+
+        thread = Thread(target=self._stream_search_results,
+                        args=(self._all_icon_names, self._filter_term,
+                              self._use_regex, self._load_generation))
+        thread.setDaemon(True)
+        thread.start()
+
+    def _stream_search_results(self, icon_name_list, filter_term, use_regex,
+                               generation):
+        """Create previews for icons matching a filter term, best match first.
+
+        Intended to be run in new thread. Matches are handed to the main
+        thread, which displays their previews as soon as they are created.
+
+        :param icon_name_list: List of icon names to search.
+        :param filter_term: String used for filtering icons by name.
+        :param use_regex: Whether the filter term is used as a regex pattern.
+        :param generation: Load generation the search was started for.
+        :return: None
+        """
+        matching_icons = _rank_icon_names(
+            icon_name_list, filter_term, use_regex,
+            lambda: generation != self._load_generation)
+        if matching_icons is None:
+            return
+        GLib.idle_add(self._add_icon_previews, matching_icons, 0, {},
+                      generation, True)
+
+    def _apply_icon_filter(self, visible_icons, generation):
+        """Update which icon previews are visible, in a single batch.
+
+        Must be run from the main thread, via GLib.idle_add. Results for a
+        filter term which has since been replaced are discarded.
+
+        :param visible_icons: Set of icon names to show.
+        :param generation: Filter generation the results were computed for.
+        :return: None
+        """
+        if generation != self._filter_generation:
+            return
+        self._visible_icons = visible_icons
+        self._icon_box.invalidate_filter()
+
+    def _compute_icon_filter(self, icon_name_list, filter_term, use_regex,
+                             generation):
+        """Find which icons match a filter term.
+
+        Intended to be run in new thread, against a snapshot of icon names.
+        The results are applied by _apply_icon_filter in the main thread.
+
+        :param icon_name_list: List of icon names to filter.
+        :param filter_term: String used for filtering icons by name.
+        :param use_regex: Whether the filter term is used as a regex pattern.
+        :param generation: Filter generation the results are computed for.
+        :return: None
+        """
+        matching_icons = _rank_icon_names(
+            icon_name_list, filter_term, use_regex,
+            lambda: generation != self._filter_generation)
+        if matching_icons is None:
+            return
+        visible_icons = set(matching_icons)
+        GLib.idle_add(self._apply_icon_filter, visible_icons, generation)
+
+    def _filter_icons(self):
+        """Filter icons based on filter term, once the filter term settles.
 
         If use_regex is True, the provided string will be used as the pattern
         for a regex match, otherwise basic case-insensitive matching is used.
-        
+        Matching is done in a new thread, cancelling any previous filtering.
+
+        When searching all contexts, the search is restarted instead.
+
+        :return: False, so that this is not repeated by GLib.timeout_add.
+        """
+        self._filter_timeout = None
+        if self._searching_all_contexts:
+            self._search_all_contexts()
+            return False
+
+        self._filter_generation += 1
+        if self._filter_term == "":
+            self._apply_icon_filter(None, self._filter_generation)
+        else:
+            thread = Thread(target=self._compute_icon_filter,
+                            args=(self._icon_names, self._filter_term,
+                                  self._use_regex, self._filter_generation))
+            thread.setDaemon(True)
+            thread.start()
+        return False
+
+    def _is_icon_preview_visible(self, flow_child):
+        """Filter function for the icon box, hiding non-matching previews.
+
+        :param flow_child: Gtk.FlowBoxChild containing a preview.
+        :return: Whether the preview should be visible.
+        """
+        if self._visible_icons is None:
+            return True
+        preview = flow_child.get_children()[0]
+        if preview.get_name() in self._visible_icons:
+            return True
+        for alias in preview.get_aliases():
+            if alias in self._visible_icons:
+                return True
+        return False
+
+    def _on_destroy(self, dialog):
+        """Stop any pending filtering or loading once the dialog is destroyed.
+
+        :param dialog: The dialog being destroyed (self)
+        :return: None
+        """
+        self._destroyed = True
+        _IconPreview.clear_caches()
+        if self._pixbuf_cache is not None:
+            self._pixbuf_cache.cancel()
+        if self._filter_timeout is not None:
+            GLib.source_remove(self._filter_timeout)
+            self._filter_timeout = None
+        if self._zoom_timeout is not None:
+            GLib.source_remove(self._zoom_timeout)
+            self._zoom_timeout = None
+        self._filter_generation += 1
+        self._load_generation += 1
+
+    def _on_filter_changed(self, entry):
+        """Schedule filtering when the filter term changes.
+
+        Filtering is debounced, so that typing quickly only filters once.
+
         :param entry: Text entry containing filter text.
         :return: None
         """
         self._filter_term = entry.get_text()
-        if self._filter_term == "":
-            for icon in self._icon_box.get_children():
-                icon.show()
-        else:
-            for icon in self._icon_box.get_children():
-                if self._use_regex:
-                    if re.search(self._filter_term, icon):
-                        icon.show()
-                    else:
-                        icon.hide()
-                else:
-                    name = icon.get_children()[0].get_name().lower()\
-                        .replace('-', ' ').replace('_', ' ')
-                    if self._filter_term.lower() in name:
-                        icon.show()
-                    else:
-                        icon.hide()
+        if self._filter_timeout is not None:
+            GLib.source_remove(self._filter_timeout)
+        self._filter_timeout = GLib.timeout_add(self.filter_delay,
+                                                self._filter_icons)
 
     def _on_context_changed(self, combobox):
         """When the context is changed, display the approprite icons.
@@ -215,8 +533,17 @@ class IconChooserDialog(Gtk.Dialog):
         :param combobox: ComboBox used for context selection.
         :return: None
         """
+        selected_context = self._context_store.get_value(
+                self._icon_context_combo.get_active_iter(), 0)
+        self._searching_all_contexts = selected_context == _ALL_CONTEXTS
+        if self._searching_all_contexts:
+            self._search_all_contexts()
+            return
+
         self._ok_button.set_sensitive(False)
         self._selected_icon = None
+        self._load_generation += 1
+        self._pixbuf_cache.cancel()
 
         for child in self._icon_box.get_children():
             child.destroy()
@@ -226,15 +553,133 @@ class IconChooserDialog(Gtk.Dialog):
         self._icon_box_frame.add(self._spinner)
         self._spinner.start()
         self._icon_context_combo.set_sensitive(False)
+        self._icon_size_scale.set_sensitive(False)
         # Load icon previews for the new context asynchronously.
-        selected_context = self._context_store.get_value(
-                self._icon_context_combo.get_active_iter(), 0)
-        current_icons = self._icon_theme.list_icons(selected_context)
-        current_icons.sort()
-        thread = Thread(target=self._create_icon_previews,
-                        args=(current_icons, self._icon_size))
-        thread.setDaemon(True)
-        thread.start()
+        current_icons = sorted(set(self._icon_theme.list_icons(
+            selected_context)))
+        self._icon_names = current_icons
+        if self._filter_term:
+            # Hide previews until it is known which match the filter term.
+            self._visible_icons = set()
+        # Filter now, rather than when a pending filter timeout fires.
+        if self._filter_timeout is not None:
+            GLib.source_remove(self._filter_timeout)
+        self._filter_icons()
+        GLib.idle_add(self._add_icon_previews, current_icons, 0, {},
+                      self._load_generation, False)
+
+    def _display_recent_icons(self):
+        """Display favorite and recently used icons above the icon box.
+
+        There are few of these, so their previews are created and loaded
+        directly, before and independently of loading the selected context.
+
+        :return: None
+        """
+        if self._icon_contexts:
+            context_list = self._used_contexts
+        else:
+            context_list = None
+        icon_names = _get_icon_history().get_icon_names(self._icon_theme,
+                                                        context_list)
+
+        for child in self._recent_icon_box.get_children():
+            child.destroy()
+        for icon in icon_names:
+            self._recent_icon_box.insert(
+                self._create_icon_preview(icon, wait=True), -1)
+
+        if icon_names:
+            self._recent_box.set_no_show_all(False)
+            self._recent_box.show_all()
+        else:
+            self._recent_box.hide()
+
+    def _on_favorite_toggled(self, button):
+        """Add or remove the selected icon from the favorite icons.
+
+        :param button: ToggleButton used to favorite the selected icon.
+        :return: None
+        """
+        if self._selected_icon:
+            _get_icon_history().set_favorite(self._selected_icon,
+                                             button.get_active())
+
+    def _on_icon_size_changed(self, scale):
+        """Schedule resizing icon previews when the icon size is changed.
+
+        :param scale: Scale used to choose the icon size.
+        :return: None
+        """
+        size = int(scale.get_value())
+        if size == self._icon_size:
+            return
+        self._icon_size = size
+        self._schedule_resize()
+
+    def _on_scale_factor_changed(self, dialog, param):
+        """Schedule reloading icon previews for the new scale factor.
+
+        :param dialog: The dialog whose scale factor changed (self)
+        :param param: GParamSpec of the scale-factor property.
+        :return: None
+        """
+        if self._pixbuf_cache is not None:
+            self._schedule_resize()
+
+    def _schedule_resize(self):
+        """Resize icon previews once the icon size settles.
+
+        :return: None
+        """
+        if self._zoom_timeout is not None:
+            GLib.source_remove(self._zoom_timeout)
+        self._zoom_timeout = GLib.timeout_add(self.zoom_delay,
+                                              self._resize_icon_previews)
+
+    def _resize_icon_previews(self):
+        """Resize existing icon previews in place to the current icon size.
+
+        Each preview immediately draws its current image scaled to the new
+        size, which costs nothing until it is drawn, while the icon is loaded
+        at the exact size asynchronously. Loads still queued for the previous
+        size are dropped. Previews scrolled into view are loaded first, then
+        the others matching the filter term, then the rest. This is also used
+        to reload previews when the scale factor changes.
+
+        :return: False, so that this is not repeated by GLib.timeout_add.
+        """
+        self._zoom_timeout = None
+        self._pixbuf_cache.cancel()
+
+        # Recent icons are few and always in view, so are loaded directly.
+        for flow_child in self._recent_icon_box.get_children():
+            preview = flow_child.get_children()[0]
+            preview.set_icon_size(self._icon_size)
+            self._load_icon(preview, True)
+
+        adjustment = self._scroller.get_vadjustment()
+        view_top = adjustment.get_value()
+        view_bottom = view_top + adjustment.get_page_size()
+
+        shown_previews = []
+        visible_previews = []
+        hidden_previews = []
+        for flow_child in self._icon_box.get_children():
+            preview = flow_child.get_children()[0]
+            preview.set_icon_size(self._icon_size)
+            allocation = flow_child.get_allocation()
+            if not flow_child.get_child_visible():
+                hidden_previews += [preview]
+            elif allocation.y + allocation.height >= view_top and \
+                    allocation.y <= view_bottom:
+                shown_previews += [preview]
+            else:
+                visible_previews += [preview]
+
+        for preview in shown_previews + visible_previews + hidden_previews:
+            self._load_icon(preview)
+        return False
 
     def _on_icon_preview_selected(self, preview):
         """Emulate OK when an icon preview is activated.
@@ -246,17 +691,31 @@ class IconChooserDialog(Gtk.Dialog):
 
     def _on_icon_selected(self, flowbox):
         """Sets the selected_icon property when the selection changes.
+
+        Only one icon can be selected between the icon box and the recent icon
+        box, so selecting in one clears the selection in the other.
         
         :param flowbox: FlowBox in which selection changed.
         :return: None
         """
         selection = flowbox.get_selected_children()
         if not selection:
+            if self._icon_box.get_selected_children() or \
+                    self._recent_icon_box.get_selected_children():
+                return
             self._selected_icon = None
             self._ok_button.set_sensitive(False)
+            self._favorite_button.set_sensitive(False)
+            self._favorite_button.set_active(False)
         else:
+            for box in (self._icon_box, self._recent_icon_box):
+                if box is not flowbox:
+                    box.unselect_all()
             self._selected_icon = selection[0].get_children()[0].get_name()
             self._ok_button.set_sensitive(True)
+            self._favorite_button.set_sensitive(True)
+            self._favorite_button.set_active(
+                _get_icon_history().is_favorite(self._selected_icon))
 
     def get_icon_contexts(self):
         """Get the list of icon contexts from which selection is allowed.
@@ -286,6 +745,13 @@ class IconChooserDialog(Gtk.Dialog):
         """
         return self._selected_icon
 
+    def get_group_aliases(self):
+        """Get whether icon names for the same image are grouped together.
+
+        :return: Whether aliases of the same image are grouped.
+        """
+        return self._group_aliases
+
     def get_use_regex(self):
         """ Get whether the filter term should be used as a regex pattern.
 
@@ -293,16 +759,35 @@ class IconChooserDialog(Gtk.Dialog):
         """
         return self._use_use_regex
 
-    def run(self):
-        """Run dialog to select a themed icon.
+    def _finish(self, response):
+        """Destroy the dialog once it has a response, and get the result.
+
+        :param response: Response ID the dialog finished with.
+        :return: Name of the selected icon, or None if none was chosen.
+        """
+        if not self._destroyed:
+            self.destroy()
+        if response == 1:
+            if self._selected_icon:
+                _get_icon_history().add_recent(self._selected_icon)
+            return self._selected_icon
+        return None
+
+    def _prepare(self):
+        """Prepare and show the dialog, without waiting for a response.
 
         This loads a the current icon theme, gets and filters available
         contexts, then filters/displays icon previews for the first
-        (alphabetically) context.
+        (alphabetically) context. If more than one context is available, an
+        "(All Contexts)" entry is also offered to search every context at once.
 
         :return: None
         """
         self._icon_theme = Gtk.IconTheme.get_default()
+        self._pixbuf_cache = _PixbufCache(self._icon_theme)
+        self._icon_size_scale.set_range(min(16, self._icon_size),
+                                        max(128, self._icon_size))
+        self._icon_size_scale.set_value(self._icon_size)
         if self._icon_contexts:
             used_contexts = []
             for context in self._icon_theme.list_contexts():
@@ -313,9 +798,15 @@ class IconChooserDialog(Gtk.Dialog):
             used_contexts = self._icon_theme.list_contexts()
             used_contexts.sort()
 
+        self._used_contexts = used_contexts
+        self._all_icon_names = None
+        self._display_recent_icons()
+
         self._context_store.clear()
         for context in used_contexts:
             self._context_store.append([context])
+        if len(used_contexts) > 1:
+            self._context_store.append([_ALL_CONTEXTS])
         self._icon_context_combo.set_active(0)
 
         if self._filter_term:
@@ -324,11 +815,46 @@ class IconChooserDialog(Gtk.Dialog):
         self._ok_button.set_sensitive(False)
 
         self.show_all()
-        result = super().run()
-        self.destroy()
-        if result == 1:
-            return self._selected_icon
-        return None
+
+    def run(self):
+        """Run dialog to select a themed icon.
+
+        This blocks in a nested main loop until the dialog is closed, see
+        run_async to wait for it from a coroutine instead.
+
+        :return: Name of the selected icon, or None if none was chosen.
+        """
+        self._prepare()
+        return self._finish(super().run())
+
+    async def run_async(self):
+        """Run dialog to select a themed icon, without a nested main loop.
+
+        The dialog is shown modal and awaited until it is closed, so that other
+        coroutines keep running meanwhile. This requires the asyncio event loop
+        to be driven by the GLib main loop, for example using
+        gi.events.GLibEventLoopPolicy (PyGObject 3.50+) or gbulb.
+
+        If the dialog is destroyed without a response, for example with its
+        parent, no icon is chosen.
+
+        :return: Name of the selected icon, or None if none was chosen.
+        """
+        response = asyncio.get_running_loop().create_future()
+
+        def on_response(dialog, response_id):
+            if not response.done():
+                response.set_result(response_id)
+
+        self.connect("response", on_response)
+        self.connect("destroy", on_response, Gtk.ResponseType.NONE)
+        self.set_modal(True)
+        self._prepare()
+        try:
+            return self._finish(await response)
+        except asyncio.CancelledError:
+            self.destroy()
+            raise
 
     def set_icon_contexts(self, context_list):
         """Set the list of icon contexts from which selection is allowed.
@@ -348,7 +874,13 @@ class IconChooserDialog(Gtk.Dialog):
     def set_icon_size(self, size):
         """Set the pixel size to display icons in.
 
-        Dialog will not update the icon size once it has been shown.
+        Once the dialog has been shown, existing icons are resized in place.
+        The icon size slider ranges from 16 to 128 px, and is extended to
+        include sizes outside of this.
+
+        Memory used by icons grows with the square of their size, roughly 64
+        KiB per icon at 128 px, so large sizes are best avoided when 1000s of
+        icons are shown.
 
         :param size: Size to display icons in, in pixels.
         :return: None
@@ -356,7 +888,13 @@ class IconChooserDialog(Gtk.Dialog):
         if not type(size) == int:
             raise TypeError("must be type int, not " +
                             type(size).__name__)
-        self._icon_size = size
+        if self._pixbuf_cache is None:
+            self._icon_size = size
+        else:
+            lower = self._icon_size_scale.get_adjustment().get_lower()
+            upper = self._icon_size_scale.get_adjustment().get_upper()
+            self._icon_size_scale.set_range(min(lower, size), max(upper, size))
+            self._icon_size_scale.set_value(size)
 
     def set_filter_term(self, filter_term):
         """Set the string used for filtering icons by name.
@@ -374,6 +912,24 @@ class IconChooserDialog(Gtk.Dialog):
                             type(filter_term).__name__)
         self._filter_term = filter_term
 
+    def set_group_aliases(self, group_aliases):
+        """Set whether icon names for the same image are grouped together.
+
+        Themes often provide the same image under several names. If
+        group_aliases is True, only one of these is listed, and filter terms
+        match any of its names. Finding aliases means looking up every icon,
+        which takes a little longer.
+
+        Dialog will not update this value once it has been shown.
+
+        :param group_aliases: Whether aliases of the same image are grouped.
+        :return: None
+        """
+        if not type(group_aliases) == bool:
+            raise TypeError("must be type bool, not " +
+                            type(group_aliases).__name__)
+        self._group_aliases = group_aliases
+
     def set_use_regex(self, use_regex):
         """Set whether or not regex terms are used to filter icons.
 
@@ -397,6 +953,10 @@ class IconChooserButton(Gtk.Button):
     The name of the selected icon is emitted via the "icon-selected" signal
     once the dialog is closed, or via the get_selected_icon_name method.
 
+    The dialog is run in a nested main loop, as with IconChooserDialog.run, so
+    that the selection is known by the time any "clicked" handlers return. To
+    avoid the nested loop, await IconChooserDialog.run_async instead.
+
     NOTE: The icon preview in the dialog and on the button may differ since
     icons can have a different appearance at different sizes.By default the
     dialog uses a larger size (32px) than the button (16px).
@@ -410,6 +970,7 @@ class IconChooserButton(Gtk.Button):
         self._icon_size = 32
         self._filter_term = ""
         self._use_regex = False
+        self._group_aliases = False
         self._selected_icon = None
 
         # Register a custom icon_selected signal for once dialog closes.
@@ -453,8 +1014,8 @@ class IconChooserButton(Gtk.Button):
         dialog.set_icon_size(self._icon_size)
         dialog.set_filter_term(self._filter_term)
         dialog.set_use_regex(self._use_regex)
+        dialog.set_group_aliases(self._group_aliases)
         self._selected_icon = dialog.run()
-        dialog.destroy()
 
         if self._selected_icon:
             self._icon.set_from_icon_name(self._selected_icon,
@@ -493,6 +1054,13 @@ class IconChooserButton(Gtk.Button):
         """
         return self._selected_icon
 
+    def get_group_aliases(self):
+        """Get whether icon names for the same image are grouped together.
+
+        :return: Whether aliases of the same image are grouped.
+        """
+        return self._group_aliases
+
     def get_use_regex(self):
         """ Get whether the filter term should be used as a regex pattern.
 
@@ -544,6 +1112,24 @@ class IconChooserButton(Gtk.Button):
                             type(filter_term).__name__)
         self._filter_term = filter_term
 
+    def set_group_aliases(self, group_aliases):
+        """Set whether icon names for the same image are grouped together.
+
+        Themes often provide the same image under several names. If
+        group_aliases is True, only one of these is listed, and filter terms
+        match any of its names. Finding aliases means looking up every icon,
+        which takes a little longer.
+
+        Dialog will not update this value once it has been shown.
+
+        :param group_aliases: Whether aliases of the same image are grouped.
+        :return: None
+        """
+        if not type(group_aliases) == bool:
+            raise TypeError("must be type bool, not " +
+                            type(group_aliases).__name__)
+        self._group_aliases = group_aliases
+
     def set_use_regex(self, use_regex):
         """Set whether or not regex terms are used to filter icons.
 
@@ -572,6 +1158,12 @@ class IconChooserComboBox(Gtk.ComboBox):
     is advised to limit the available icons by setting filter terms or context
     filters before population. I've attempted to make this asynchronous so as
     to avoid such delays but had no luck.
+
+    Favorite and recently used icons are available immediately, before
+    population, and are listed first once populated.
+
+    All combo boxes share one underlying model of icons, which is only filled
+    once, each showing the icons they allow through their own filter model.
     """
     def __init__(self):
         super().__init__()
@@ -579,6 +1171,10 @@ class IconChooserComboBox(Gtk.ComboBox):
         self._icon_contexts = []
         self._filter_term = ""
         self._use_regex = False
+        self._group_aliases = False
+        self._populated = False
+        self._recent_icons = set()
+        self._visible_icons = None
 
         pixbuf_renderer = Gtk.CellRendererPixbuf()
         pixbuf_renderer.set_alignment(0, 0.5)
@@ -586,12 +1182,88 @@ class IconChooserComboBox(Gtk.ComboBox):
         text_renderer = Gtk.CellRendererText()
         text_renderer.set_alignment(0, 0.5)
 
-        self._icon_store = Gtk.ListStore(str, str)
+        shared_store = _get_shared_icon_store()
+        self._icon_store = shared_store.get_model().filter_new()
+        self._icon_store.set_visible_func(self._is_row_visible)
         self.set_model(self._icon_store)
+        shared_store.add_combo_box(self)
+        shared_store.sync_recent_icons()
         self.pack_start(pixbuf_renderer, True)
         self.add_attribute(pixbuf_renderer, "icon_name", 0)
         self.pack_start(text_renderer, True)
         self.add_attribute(text_renderer, "text", 1)
+        # Rows without an icon name separate recent icons from the rest.
+        self.set_row_separator_func(
+            lambda model, tree_iter, data:
+                model.get_value(tree_iter, 0) is None,
+            None)
+
+        self._update_recent_icons()
+        self._icon_store.refilter()
+        self.set_active(0)
+
+        self._popup_selection = None
+        self.connect("notify::popup-shown", self._on_popup_shown)
+
+    def _is_row_visible(self, model, tree_iter, data):
+        """Visible function for the filter model over the shared icon store.
+
+        :param model: The shared Gtk.ListStore of icons.
+        :param tree_iter: Gtk.TreeIter of the row to check.
+        :param data: Unused.
+        :return: Whether the row is shown in this combo box.
+        """
+        icon, text, context, is_recent = model.get(tree_iter, 0, 1, 2, 3)
+        if is_recent:
+            if icon is None:
+                return bool(self._recent_icons)
+            return icon in self._recent_icons
+        if context is None:
+            return True
+        if not self._populated:
+            return False
+        return self._visible_icons is None or icon in self._visible_icons
+
+    def _update_recent_icons(self):
+        """Update which favorite and recently used icons are shown.
+
+        Only icons allowed by the icon contexts and filter term are shown,
+        followed by a separator if there are any.
+
+        :return: None
+        """
+        icon_names = _get_icon_history().get_icon_names(
+            Gtk.IconTheme.get_default(), self._icon_contexts or None)
+        if self._filter_term:
+            icon_names = _rank_icon_names(icon_names, self._filter_term,
+                                          self._use_regex)
+        self._recent_icons = set(icon_names)
+
+    def _on_popup_shown(self, combobox, param):
+        """Remember the selected icon as recently used, once it is chosen.
+
+        Only a selection changed using the popup counts, so that scrolling
+        through icons over the combo box does not record each one passed.
+
+        :param combobox: The combo box whose popup was shown or hidden (self)
+        :param param: GParamSpec of the popup-shown property.
+        :return: None
+        """
+        if self.get_property("popup-shown"):
+            self._popup_selection = self.get_selected_icon_name()
+        else:
+            # A menu is hidden before the row chosen from it is activated.
+            GLib.idle_add(self._record_popup_selection)
+
+    def _record_popup_selection(self):
+        """Remember the selected icon as recently used, if chosen from popup.
+
+        :return: False, so that this is not repeated by GLib.idle_add.
+        """
+        selection = self.get_selected_icon_name()
+        if selection and selection != self._popup_selection:
+            _get_icon_history().add_recent(selection)
+        return False
 
     def get_icon_contexts(self):
         """Get the list of icon contexts from which selection is allowed.
@@ -612,12 +1284,22 @@ class IconChooserComboBox(Gtk.ComboBox):
 
         :return: Name of the currently selected icon.
         """
-        selection = self._icon_store.get_value(self.get_active_iter(), 0)
+        active_iter = self.get_active_iter()
+        if active_iter is None:
+            return None
+        selection = self._icon_store.get_value(active_iter, 1)
         if selection == "(Choose An Icon)":
             return None
         else:
             return selection
 
+    def get_group_aliases(self):
+        """Get whether icon names for the same image are grouped together.
+
+        :return: Whether aliases of the same image are grouped.
+        """
+        return self._group_aliases
+
     def get_use_regex(self):
         """ Get whether the filter term should be used as a regex pattern.
 
@@ -632,40 +1314,128 @@ class IconChooserComboBox(Gtk.ComboBox):
         display. Therefore itis advised to limit the available icons by setting
         filter terms or context filters before population. I've attempted to
         make this asynchronous so as to avoid such delays but had no luck.
+
+        The shared model of icons is only filled by the first combo box to be
+        populated, later combo boxes just filter it.
         
         :return: None
         """
-        unfiltered_icons = []
-        icon_theme = Gtk.IconTheme.get_default()
-        if not self._icon_contexts:
-            for context in icon_theme.list_contexts():
-                unfiltered_icons += icon_theme.list_icons(context)
-        else:
-            for context in icon_theme.list_contexts():
-                if context not in self._icon_contexts:
-                    continue
-                unfiltered_icons += icon_theme.list_icons(context)
+        shared_store = _get_shared_icon_store()
+        shared_store.populate()
+        shared_store.sync_recent_icons()
+        self._update_recent_icons()
+        self._visible_icons = self._match_icons(
+            shared_store.get_context_icons(), self._icon_contexts,
+            self._filter_term, self._use_regex, self._get_alias_groups())
+        self._show_icons()
+
+    async def populate_async(self):
+        """Populate the combo box with themed icons, from a coroutine.
+
+        The shared model of icons is filled, aliases are found and icons are
+        shown in chunks, and icons are matched against the filter term in an
+        executor thread, so that other coroutines keep running meanwhile. GTK
+        is only used from the main thread. This requires the asyncio event
+        loop to be driven by the GLib main loop, see
+        IconChooserDialog.run_async.
 
-        filtered_icons = []
-        if not self._filter_term:
-            for icon in unfiltered_icons:
-                filtered_icons += [icon]
+        :return: None
+        """
+        shared_store = _get_shared_icon_store()
+        await shared_store.populate_async()
+        shared_store.sync_recent_icons()
+        self._update_recent_icons()
+        alias_groups = None
+        if self._group_aliases:
+            alias_groups = await shared_store.get_alias_groups_async()
+        self._visible_icons = await asyncio.get_running_loop().run_in_executor(
+            None, self._match_icons, shared_store.get_context_icons(),
+            self._icon_contexts, self._filter_term, self._use_regex,
+            alias_groups)
+        await self._show_icons_async()
+
+    def _get_alias_groups(self):
+        """Get the shared alias groups, if aliases are to be grouped.
+
+        :return: Dict of icon name to its alias group, or None.
+        """
+        if not self._group_aliases:
+            return None
+        return _get_shared_icon_store().get_alias_groups()
+
+    @staticmethod
+    def _match_icons(context_icons, context_list, filter_term, use_regex,
+                     alias_groups):
+        """Find which icons of the allowed contexts match the filter term.
+
+        When grouping aliases, only the first allowed name (alphabetically) of
+        each image is included, if any of its names match. This only uses
+        plain Python data, so may be run in any thread.
+
+        :param context_icons: Dict of icon context to list of icon names.
+        :param context_list: List of icon contexts to allow, empty for all.
+        :param filter_term: String used for filtering icons by name.
+        :param use_regex: Whether the filter term is used as a regex pattern.
+        :param alias_groups: Dict of icon name to the sorted list of names of
+            the same image, or None if aliases are not grouped.
+        :return: Set of matching icon names, or None if all icons match.
+        """
+        if not (context_list or filter_term or alias_groups is not None):
+            return None
+        unfiltered_icons = set()
+        for context, icons in context_icons.items():
+            if context_list and context not in context_list:
+                continue
+            unfiltered_icons.update(icons)
+
+        if filter_term:
+            matching_icons = set(_rank_icon_names(unfiltered_icons,
+                                                  filter_term, use_regex))
         else:
-            for icon in unfiltered_icons:
-                if self._use_regex:
-                    if not re.search(self._filter_term, icon):
-                        continue
-                else:
-                    if not self._filter_term.lower() in \
-                            icon.lower().replace('-', ' ').replace('_', ' '):
-                        continue
-                filtered_icons += [icon]
+            matching_icons = unfiltered_icons
+        if alias_groups is None:
+            return matching_icons
+
+        visible_icons = set()
+        for icon in matching_icons:
+            for name in alias_groups.get(icon, [icon]):
+                if name in unfiltered_icons:
+                    visible_icons.add(name)
+                    break
+        return visible_icons
 
+    def _show_icons(self):
+        """Show the icons allowed once populated, and reset the selection.
+
+        :return: None
+        """
+        self._populated = True
         # This section can be slow with many icons to show()
-        self._icon_store.clear()
-        self._icon_store.append(["gtk-search", "(Choose An Icon)"])
-        for icon in filtered_icons:
-            self._icon_store.append([icon, icon])
+        self._icon_store.refilter()
+        self.set_active(0)
+        self.show_all()
+
+    async def _show_icons_async(self, chunk_size=500):
+        """Show the icons allowed once populated, from a coroutine.
+
+        Rather than refiltering every row at once, rows of the shared model are
+        marked changed in chunks, yielding to other coroutines between them, so
+        that each is checked again by the filter model.
+
+        :param chunk_size: Number of rows to check between yields.
+        :return: None
+        """
+        self._populated = True
+        shared_model = _get_shared_icon_store().get_model()
+        index = 0
+        # Rows may be added or removed by other combo boxes meanwhile.
+        while index < len(shared_model):
+            tree_iter = shared_model.get_iter(index)
+            shared_model.row_changed(shared_model.get_path(tree_iter),
+                                     tree_iter)
+            index += 1
+            if index % chunk_size == 0:
+                await asyncio.sleep(0)
         self.set_active(0)
         self.show_all()
 
@@ -700,6 +1470,24 @@ class IconChooserComboBox(Gtk.ComboBox):
                             type(filter_term).__name__)
         self._filter_term = filter_term
 
+    def set_group_aliases(self, group_aliases):
+        """Set whether icon names for the same image are grouped together.
+
+        Themes often provide the same image under several names. If
+        group_aliases is True, only one of these is listed, and filter terms
+        match any of its names. Finding aliases means looking up every icon,
+        which takes a little longer.
+
+        Combobox will not update this value once it has been shown.
+
+        :param group_aliases: Whether aliases of the same image are grouped.
+        :return: None
+        """
+        if not type(group_aliases) == bool:
+            raise TypeError("must be type bool, not " +
+                            type(group_aliases).__name__)
+        self._group_aliases = group_aliases
+
     def set_use_regex(self, use_regex):
         """Set whether or not regex terms are used to filter icons.
 
@@ -717,35 +1505,853 @@ class IconChooserComboBox(Gtk.ComboBox):
         self._use_regex = use_regex
 
 
-class _IconPreview(Gtk.Box):
-    """Creates a preview box for icons containing the icon and its name."""
-    def __init__(self, name, size):
+def _get_icon_history():
+    """Get the icon history shared by all widgets, loading it if necessary.
+
+    :return: The shared _IconHistory.
+    """
+    global _icon_history
+    if _icon_history is None:
+        _icon_history = _IconHistory(_icon_history_path)
+    return _icon_history
+
+
+def get_history_file():
+    """Get the file favorite and recently used icons are kept in.
+
+    :return: Path of the file, or None if the history is not kept on disk.
+    """
+    return _icon_history_path
+
+
+def set_history_file(path):
+    """Set the file favorite and recently used icons are kept in.
+
+    The history is shared by all widgets, and by default kept in
+    ThemedIconChooser/history.json in the user's data directory. Setting the
+    file reloads the history from it, after writing any unsaved changes to the
+    previous file.
+
+    :param path: Path of the file, or None to keep the history in memory only.
+    :return: None
+    """
+    global _icon_history, _icon_history_path
+    if not (path is None or type(path) == str):
+        raise TypeError("must be type str or None, not " +
+                        type(path).__name__)
+    if _icon_history is not None:
+        _icon_history.close()
+        _icon_history = None
+    _icon_history_path = path
+
+
+def _get_shared_icon_store():
+    """Get the icon store shared by all combo boxes, creating it if necessary.
+
+    :return: The shared _SharedIconStore.
+    """
+    global _shared_icon_store
+    if _shared_icon_store is None:
+        _shared_icon_store = _SharedIconStore()
+    return _shared_icon_store
+
+
+def _group_icon_aliases(icon_name_list, icon_files):
+    """Group icon names which resolve to the same image file.
+
+    Themes often provide one image under several names using symlinks. Each
+    group is listed under the first of its names in icon_name_list, in that
+    order. Icons without an image file are listed on their own. This only uses
+    plain Python data, so may be run in any thread.
+
+    :param icon_name_list: List of icon names to group.
+    :param icon_files: Dict of icon name to the real path of its image file,
+        or None if it has none, see _get_icon_file.
+    :return: List of (icon name, list of alias names) tuples.
+    """
+    grouped_icons = []
+    icon_groups = {}
+    for icon in icon_name_list:
+        icon_file = icon_files[icon]
+        if icon_file is None:
+            grouped_icons += [(icon, [])]
+        elif icon_file in icon_groups:
+            icon_groups[icon_file][1].append(icon)
+        else:
+            icon_groups[icon_file] = (icon, [])
+            grouped_icons += [icon_groups[icon_file]]
+    return grouped_icons
+
+
+def _get_icon_file(icon_info):
+    """Get the real path of the image file an icon was looked up as.
+
+    :param icon_info: Gtk.IconInfo of the icon, or None if it was not found.
+    :return: Path with symlinks resolved, or None if there is no such file.
+    """
+    if icon_info is None or not icon_info.get_filename():
+        return None
+    return os.path.realpath(icon_info.get_filename())
+
+
+def _rank_icon_names(icon_name_list, filter_term, use_regex,
+                     is_cancelled=None):
+    """Get the icon names matching a filter term, ordered best match first.
+
+    Exact matches come first, then matches at the start of the name, then
+    matches at the start of a word, then any other match. Ties are ordered by
+    name length, then alphabetically. An invalid regex pattern matches nothing.
+
+    :param icon_name_list: List of icon names to match against.
+    :param filter_term: String used for filtering icons by name.
+    :param use_regex: Whether the filter term is used as a regex pattern.
+    :param is_cancelled: Function checked periodically while matching, which
+        returns True if the results are no longer wanted.
+    :return: List of matching icon names, or None if cancelled.
+    """
+    ranked_icons = []
+    if use_regex:
+        try:
+            pattern = re.compile(filter_term)
+        except re.error:
+            return []
+        for index, icon in enumerate(icon_name_list):
+            if is_cancelled and index % 256 == 0 and is_cancelled():
+                return None
+            match = pattern.search(icon)
+            if not match:
+                continue
+            if match.group() == icon:
+                rank = 0
+            elif match.start() == 0:
+                rank = 1
+            else:
+                rank = 3
+            ranked_icons += [(rank, len(icon), icon)]
+    else:
+        term = filter_term.lower().replace('-', ' ').replace('_', ' ')
+        for index, icon in enumerate(icon_name_list):
+            if is_cancelled and index % 256 == 0 and is_cancelled():
+                return None
+            name = icon.lower().replace('-', ' ').replace('_', ' ')
+            if term not in name:
+                continue
+            if name == term:
+                rank = 0
+            elif name.startswith(term):
+                rank = 1
+            elif ' ' + term in name:
+                rank = 2
+            else:
+                rank = 3
+            ranked_icons += [(rank, len(icon), icon)]
+    ranked_icons.sort()
+    return [icon for rank, length, icon in ranked_icons]
+
+
+class _IconHistory:
+    """Small persistent store of recently used and favorite icon names.
+
+    The store is a JSON file which is read once when created. Changes are
+    written shortly after they are made, so that several changes in quick
+    succession are written once, and any not yet written are written at exit.
+    Failing to read or write it is not an error, as the history is only a
+    convenience. Without a path, the history is only kept in memory.
+    """
+    max_recent = 24
+    # Milliseconds to wait for further changes before writing the history.
+    save_delay = 1000
+
+    def __init__(self, path):
+        self._path = path
+        self._favorites = []
+        self._recent = []
+        self._save_timeout = None
+        if self._path is None:
+            return
+        atexit.register(self._flush)
+
+        try:
+            with open(self._path) as history_file:
+                history = json.load(history_file)
+        except (OSError, ValueError):
+            return
+        if not isinstance(history, dict):
+            return
+        favorites = history.get("favorites")
+        if isinstance(favorites, list):
+            self._favorites = [icon for icon in favorites
+                               if type(icon) == str]
+        recent = history.get("recent")
+        if isinstance(recent, list):
+            self._recent = [icon for icon in recent
+                            if type(icon) == str][:self.max_recent]
+
+    def close(self):
+        """Write any unsaved changes, and stop writing them at exit.
+
+        :return: None
+        """
+        if self._path is not None:
+            atexit.unregister(self._flush)
+        self._flush()
+
+    def _flush(self):
+        """Write any changes not yet written by a scheduled save.
+
+        :return: None
+        """
+        if self._save_timeout is not None:
+            GLib.source_remove(self._save_timeout)
+            self._save()
+
+    def _schedule_save(self):
+        """Write the history to disk shortly, unless already scheduled.
+
+        :return: None
+        """
+        if self._path is not None and self._save_timeout is None:
+            self._save_timeout = GLib.timeout_add(self.save_delay, self._save)
+
+    def _save(self):
+        """Write the history to disk, replacing the previous file atomically.
+
+        :return: False, so that this is not repeated by GLib.timeout_add.
+        """
+        self._save_timeout = None
+        temp_path = self._path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(temp_path, "w") as history_file:
+                json.dump({"favorites": self._favorites,
+                           "recent": self._recent}, history_file)
+            os.replace(temp_path, self._path)
+        except OSError:
+            pass
+        return False
+
+    def add_recent(self, icon_name):
+        """Move an icon to the front of the recently used icons.
+
+        :param icon_name: Name of the icon used.
+        :return: None
+        """
+        if self._recent[:1] == [icon_name]:
+            return
+        if icon_name in self._recent:
+            self._recent.remove(icon_name)
+        self._recent = [icon_name] + self._recent[:self.max_recent - 1]
+        self._schedule_save()
+
+    def get_icon_names(self, icon_theme, context_list=None):
+        """Get favorite and then recently used icons available in a theme.
+
+        :param icon_theme: Gtk.IconTheme the icons must be available in.
+        :param context_list: List of icon contexts the icons must belong to,
+            or None to allow icons from any context.
+        :return: List of icon names, without duplicates.
+        """
+        allowed_icons = None
+        if context_list is not None:
+            allowed_icons = set()
+            for context in context_list:
+                allowed_icons.update(icon_theme.list_icons(context))
+
+        icon_names = []
+        for icon in self._favorites + self._recent:
+            if icon in icon_names or not icon_theme.has_icon(icon):
+                continue
+            if allowed_icons is not None and icon not in allowed_icons:
+                continue
+            icon_names += [icon]
+        return icon_names
+
+    def is_favorite(self, icon_name):
+        """Get whether an icon is a favorite.
+
+        :param icon_name: Name of the icon.
+        :return: Whether the icon is a favorite.
+        """
+        return icon_name in self._favorites
+
+    def set_favorite(self, icon_name, favorite):
+        """Add or remove an icon from the favorite icons.
+
+        :param icon_name: Name of the icon.
+        :param favorite: Whether the icon should be a favorite.
+        :return: None
+        """
+        if favorite == self.is_favorite(icon_name):
+            return
+        if favorite:
+            self._favorites += [icon_name]
+        else:
+            self._favorites.remove(icon_name)
+        self._schedule_save()
+
+
+class _SharedIconStore:
+    """Model of themed icons shared by all IconChooserComboBoxes.
+
+    Rows hold the icon name, display text, (first) context and whether the row
+    is in the section of favorite and recently used icons. The model starts
+    with a placeholder row, then that section, closed by a separator row
+    without an icon name. Every icon of the theme is appended once, when first
+    populated.
+
+    The section is kept in favorite then most recently used order, except
+    while a combo box has one of its rows active, see sync_recent_icons.
+
+    When the icon theme changes, its icons are listed again, and combo boxes
+    already populated are populated again.
+    """
+    def __init__(self):
+        self._model = Gtk.ListStore(str, str, str, bool)
+        self._model.append(["gtk-search", "(Choose An Icon)", None, False])
+        self._model.append([None, None, None, True])
+        self._combo_boxes = weakref.WeakSet()
+        self._alias_groups = None
+        self._context_icons = None
+        self._pending_rows = []
+        self._recent_icons = []
+        Gtk.IconTheme.get_default().connect("changed",
+                                            self._on_icon_theme_changed)
+
+    def _is_recent_row_active(self):
+        """Get whether any combo box has a favorite or recent icon active.
+
+        :return: Whether a row of the section is active in any combo box.
+        """
+        for combo_box in self._combo_boxes:
+            active_iter = combo_box.get_active_iter()
+            if active_iter is None:
+                continue
+            child_iter = combo_box.get_model().convert_iter_to_child_iter(
+                active_iter)
+            if self._model.get_value(child_iter, 3):
+                return True
+        return False
+
+    def _on_icon_theme_changed(self, icon_theme):
+        """Replace the icons of the previous theme with those of the new one.
+
+        :param icon_theme: The default Gtk.IconTheme, which changed.
+        :return: None
+        """
+        # Rows after the separator closing the recent section are icons.
+        first_icon = len(self._recent_icons) + 2
+        while len(self._model) > first_icon:
+            self._model.remove(self._model.get_iter(first_icon))
+        self._alias_groups = None
+        self._context_icons = None
+        self._pending_rows = []
+        self.sync_recent_icons()
+        for combo_box in list(self._combo_boxes):
+            if combo_box._populated:
+                combo_box.populate()
+
+    def add_combo_box(self, combo_box):
+        """Register a combo box showing the model.
+
+        :param combo_box: IconChooserComboBox using the model.
+        :return: None
+        """
+        self._combo_boxes.add(combo_box)
+
+    @staticmethod
+    def _list_icons():
+        """List every icon of the current icon theme, by context.
+
+        :return: Dict of icon context to list of icon names.
+        """
+        icon_theme = Gtk.IconTheme.get_default()
+        context_icons = {}
+        for context in icon_theme.list_contexts():
+            context_icons[context] = icon_theme.list_icons(context)
+        return context_icons
+
+    def _set_context_icons(self, context_icons):
+        """Record the icons of the theme, queueing their rows to be appended.
+
+        :param context_icons: Dict of icon context to list of icon names.
+        :return: None
+        """
+        self._context_icons = context_icons
+        # Icons in several contexts get a single row, under the first of them.
+        queued_icons = set()
+        for context, icons in context_icons.items():
+            for icon in icons:
+                if icon in queued_icons:
+                    continue
+                queued_icons.add(icon)
+                self._pending_rows += [[icon, icon, context, False]]
+
+    def _set_alias_groups(self, icon_names, icon_files):
+        """Record the names of each image, given the image file of each icon.
+
+        :param icon_names: Sorted list of every icon name of the theme.
+        :param icon_files: Dict of icon name to the real path of its image
+            file, or None if it has none.
+        :return: None
+        """
+        self._alias_groups = {}
+        for icon, aliases in _group_icon_aliases(icon_names, icon_files):
+            group = [icon] + aliases
+            for name in group:
+                self._alias_groups[name] = group
+
+    def _get_icon_names(self):
+        """Get every icon name in the model.
+
+        :return: Sorted list of icon names.
+        """
+        icon_names = set()
+        for icons in self._context_icons.values():
+            icon_names.update(icons)
+        return sorted(icon_names)
+
+    def get_alias_groups(self):
+        """Get the names of each image, finding them on first use.
+
+        This looks up every icon of the theme, so is done only once, and must
+        be done from the main thread. The model must have been populated.
+
+        :return: Dict of icon name to the sorted list of names of its image.
+        """
+        if self._alias_groups is None:
+            icon_theme = Gtk.IconTheme.get_default()
+            icon_names = self._get_icon_names()
+            icon_files = {}
+            for icon in icon_names:
+                icon_files[icon] = _get_icon_file(
+                    icon_theme.lookup_icon(icon, 16, 0))
+            self._set_alias_groups(icon_names, icon_files)
+        return self._alias_groups
+
+    async def get_alias_groups_async(self, chunk_size=500):
+        """Get the names of each image, from a coroutine.
+
+        As get_alias_groups, but icons are looked up in chunks, yielding to
+        other coroutines between them. The model must have been populated.
+
+        :param chunk_size: Number of icons to look up between yields.
+        :return: Dict of icon name to the sorted list of names of its image.
+        """
+        while self._alias_groups is None:
+            if self._context_icons is None:
+                await self.populate_async()
+                continue
+            context_icons = self._context_icons
+            icon_theme = Gtk.IconTheme.get_default()
+            icon_names = self._get_icon_names()
+            icon_files = {}
+            for start in range(0, len(icon_names), chunk_size):
+                for icon in icon_names[start:start + chunk_size]:
+                    icon_files[icon] = _get_icon_file(
+                        icon_theme.lookup_icon(icon, 16, 0))
+                await asyncio.sleep(0)
+                # Start again if the theme changed meanwhile.
+                if self._context_icons is not context_icons:
+                    break
+            else:
+                if self._alias_groups is None:
+                    self._set_alias_groups(icon_names, icon_files)
+        return self._alias_groups
+
+    def get_context_icons(self):
+        """Get the icons in the model, by context.
+
+        :return: Dict of icon context to list of icon names, or None if the
+            model has not been populated yet.
+        """
+        return self._context_icons
+
+    def get_model(self):
+        """Get the shared model.
+
+        :return: Gtk.ListStore of icons.
+        """
+        return self._model
+
+    def populate(self):
+        """Append every icon of the current icon theme, if not already done.
+
+        :return: None
+        """
+        if self._context_icons is None:
+            self._set_context_icons(self._list_icons())
+        pending_rows = self._pending_rows
+        self._pending_rows = []
+        for row in pending_rows:
+            self._model.append(row)
+
+    async def populate_async(self, chunk_size=500):
+        """Append every icon of the current icon theme, from a coroutine.
+
+        Listing the theme is quick, and GTK is not thread safe, so it is done
+        directly. Rows are then appended in chunks, yielding to other
+        coroutines between them. This may safely overlap with populate or other
+        calls to populate_async.
+
+        :param chunk_size: Number of rows to append between yields.
+        :return: None
+        """
+        if self._context_icons is None:
+            self._set_context_icons(self._list_icons())
+        while self._pending_rows:
+            pending_rows = self._pending_rows[:chunk_size]
+            del self._pending_rows[:chunk_size]
+            for row in pending_rows:
+                self._model.append(row)
+            await asyncio.sleep(0)
+
+    def sync_recent_icons(self):
+        """Update the favorite and recently used icons in the model.
+
+        The section is rebuilt in the order of the icon history, unless a combo
+        box has one of its rows active, as removing that row would change its
+        selection. In that case newly used icons are only added at the start of
+        the section, so it may be out of order, or keep icons no longer in the
+        history, until it can next be rebuilt. Each combo box decides which of
+        them to show.
+
+        :return: None
+        """
+        icon_names = _get_icon_history().get_icon_names(
+            Gtk.IconTheme.get_default())
+        if icon_names == self._recent_icons:
+            return
+
+        if not self._is_recent_row_active():
+            for i in range(len(self._recent_icons)):
+                self._model.remove(self._model.get_iter(1))
+            for position, icon in enumerate(icon_names, 1):
+                self._model.insert(position, [icon, icon, None, True])
+            self._recent_icons = icon_names
+            return
+
+        for icon in reversed(icon_names):
+            if icon in self._recent_icons:
+                continue
+            self._recent_icons.insert(0, icon)
+            self._model.insert(1, [icon, icon, None, True])
+
+
+class _PixbufCache:
+    """Cache of themed icon pixbufs, by image file, size and scale factor.
+
+    Icons are looked up in the theme from the main thread, as Gtk.IconTheme is
+    not thread safe, and their images are then loaded in GTK's own threads.
+    Only a few are loaded at once, and the rest queued, so that queued loads
+    can be dropped once no longer wanted.
+
+    Icon names resolving to the same image file at a size share the cached
+    pixbuf, so each image is only decoded once. The file is resolved at the
+    size being loaded, as themes may share artwork at some sizes but not
+    others. Only the size most recently loaded is kept, since previews draw
+    their current image scaled while being resized.
+    """
+    # Number of icons loaded at once.
+    max_loads = 4
+
+    def __init__(self, icon_theme):
+        self._icon_theme = icon_theme
+        self._pixbufs = {}
+        self._loading = {}
+        self._queue = deque()
+        self._size = None
+
+    def _look_up(self, icon_name, size, scale):
+        """Look an icon up, forgetting cached pixbufs of another size.
+
+        :param icon_name: Name of the icon.
+        :param size: Size to look the icon up at, in pixels.
+        :param scale: Scale factor to look the icon up for.
+        :return: Tuple of the cache key and Gtk.IconInfo of the icon, or of
+            None and None if there is no such icon.
+        """
+        if (size, scale) != self._size:
+            self._size = (size, scale)
+            self._pixbufs = {}
+        icon_info = self._icon_theme.lookup_icon_for_scale(
+            icon_name, size, scale, Gtk.IconLookupFlags.FORCE_SIZE)
+        if icon_info is None:
+            return None, None
+        # Icons without an image file of their own are cached by name.
+        return (_get_icon_file(icon_info) or icon_name, size, scale), icon_info
+
+    def _load_queued(self):
+        """Start loading queued icons, up to max_loads at once.
+
+        :return: None
+        """
+        while self._queue and len(self._loading) < self.max_loads:
+            icon_name, size, scale, callback, user_data = \
+                self._queue.popleft()
+            key, icon_info = self._look_up(icon_name, size, scale)
+            if key is None:
+                callback(None, *user_data)
+            elif key in self._pixbufs:
+                callback(self._pixbufs[key], *user_data)
+            elif key in self._loading:
+                self._loading[key] += [(callback, user_data)]
+            else:
+                self._loading[key] = [(callback, user_data)]
+                icon_info.load_icon_async(None, self._on_icon_loaded, key)
+
+    def _on_icon_loaded(self, icon_info, result, key):
+        """Cache a loaded icon and hand it to those waiting for it.
+
+        :param icon_info: Gtk.IconInfo of the icon loaded.
+        :param result: Gio.AsyncResult of loading the icon.
+        :param key: Cache key of the icon.
+        :return: None
+        """
+        callbacks = self._loading.pop(key)
+        try:
+            pixbuf = icon_info.load_icon_finish(result)
+        except GLib.Error:
+            pixbuf = None
+        if pixbuf is not None and key[1:] == self._size:
+            self._pixbufs[key] = pixbuf
+        for callback, user_data in callbacks:
+            callback(pixbuf, *user_data)
+        self._load_queued()
+
+    def cancel(self):
+        """Drop queued icons which have not started loading yet.
+
+        :return: None
+        """
+        self._queue.clear()
+
+    def load(self, icon_name, size, scale):
+        """Get an icon at an exact size, loading it now if not already cached.
+
+        Must be called from the main thread.
+
+        :param icon_name: Name of the icon.
+        :param size: Size to load the icon at, in pixels.
+        :param scale: Scale factor to load the icon for.
+        :return: GdkPixbuf.Pixbuf, or None if the icon could not be loaded.
+        """
+        key, icon_info = self._look_up(icon_name, size, scale)
+        if key is None:
+            return None
+        if key not in self._pixbufs:
+            try:
+                self._pixbufs[key] = icon_info.load_icon()
+            except GLib.Error:
+                return None
+        return self._pixbufs[key]
+
+    def load_async(self, icon_name, size, scale, callback, *user_data):
+        """Queue an icon to be loaded at an exact size, if not already cached.
+
+        Must be called from the main thread. Once loaded, callback is called
+        from the main thread with the GdkPixbuf.Pixbuf, or None if the icon
+        could not be loaded, followed by user_data.
+
+        :param icon_name: Name of the icon.
+        :param size: Size to load the icon at, in pixels.
+        :param scale: Scale factor to load the icon for.
+        :param callback: Function to call with the loaded icon.
+        :param user_data: Further arguments to call callback with.
+        :return: None
+        """
+        self._queue.append((icon_name, size, scale, callback, user_data))
+        self._load_queued()
+
+
+class _IconPreview(Gtk.DrawingArea):
+    """Draws a preview of an icon, with its name as a caption beneath it.
+
+    The icon and caption are drawn by this one widget, rather than a box, image
+    and label, to keep the number of objects per icon low with 1000s of icons.
+    A single caption layout is shared by all previews, given each caption's
+    text as it is measured or drawn, and only the height of each caption is
+    cached. The tooltip text and accessible name are only set once they are
+    queried.
+
+    Nothing is drawn for the icon until its image has been given, using
+    set_pixbuf, after which a missing image is drawn if it could not be loaded.
+    """
+    caption_lines = 3
+    caption_width_chars = 8
+    spacing = 2
+
+    # Shared by all previews, and reset if the font changes.
+    _caption_font = None
+    _caption_heights = {}
+    _caption_layout = None
+    _caption_width = 0
+    _missing_icons = {}
+
+    def __init__(self, name, size, aliases=()):
         super().__init__()
-        self.set_orientation(Gtk.Orientation.VERTICAL)
-        self.set_spacing(2)
+        self.set_has_tooltip(True)
 
         self._icon_name = name
         self._display_name = name.replace('-', ' ').replace('_', ' ')
         self._icon_size = size
+        self._aliases = aliases
+        self._pixbuf = None
+        self._pixbuf_size = size
+        self._pixbuf_scale = 1
+        self._loaded = False
+        self._accessible_named = False
+
+    @staticmethod
+    def clear_caches():
+        """Release the caption layout and images shared between previews.
+
+        This is done when a dialog is destroyed, so that they are not kept for
+        the life of the process.
+
+        :return: None
+        """
+        _IconPreview._caption_font = None
+        _IconPreview._caption_heights = {}
+        _IconPreview._caption_layout = None
+        _IconPreview._missing_icons = {}
+
+    def _update_caption_font(self):
+        """Create the shared caption layout, again if the font has changed.
+
+        :return: None
+        """
+        pango_context = self.get_pango_context()
+        font = pango_context.get_font_description().to_string()
+        if font == _IconPreview._caption_font:
+            return
+        metrics = pango_context.get_metrics(None, None)
+        caption_width = \
+            metrics.get_approximate_char_width() * self.caption_width_chars
+        layout = Pango.Layout.new(pango_context)
+        layout.set_alignment(Pango.Alignment.CENTER)
+        layout.set_width(caption_width)
+        # A negative height limits the number of lines instead.
+        layout.set_height(-self.caption_lines)
+        layout.set_wrap(Pango.WrapMode.WORD_CHAR)
+        layout.set_ellipsize(Pango.EllipsizeMode.END)
+
+        _IconPreview._caption_font = font
+        _IconPreview._caption_heights = {}
+        _IconPreview._caption_layout = layout
+        _IconPreview._caption_width = caption_width
+
+    def _get_caption_height(self):
+        """Get the height of the caption, measuring it on first use.
+
+        :return: Height of the caption, in pixels.
+        """
+        self._update_caption_font()
+        caption_heights = _IconPreview._caption_heights
+        height = caption_heights.get(self._display_name)
+        if height is None:
+            height = self._get_caption_layout().get_pixel_size()[1]
+            caption_heights[self._display_name] = height
+        return height
+
+    def _get_caption_layout(self):
+        """Get the shared caption layout, set to the icon's display name.
+
+        :return: Pango.Layout of the icon's display name.
+        """
+        self._update_caption_font()
+        layout = _IconPreview._caption_layout
+        layout.set_text(self._display_name, -1)
+        return layout
+
+    def _get_pixbuf(self):
+        """Get the pixbuf to draw, using a missing image if there is none.
+
+        :return: GdkPixbuf.Pixbuf to draw, or None if there is nothing to draw.
+        """
+        if self._pixbuf is not None or not self._loaded:
+            return self._pixbuf
+        self._pixbuf_size = self._icon_size
+        self._pixbuf_scale = self.get_scale_factor()
+        key = (self._pixbuf_size, self._pixbuf_scale)
+        pixbuf = _IconPreview._missing_icons.get(key)
+        if pixbuf is None:
+            icon_info = Gtk.IconTheme.get_default().lookup_icon_for_scale(
+                "image-missing", self._pixbuf_size, self._pixbuf_scale,
+                Gtk.IconLookupFlags.FORCE_SIZE)
+            if icon_info is None:
+                return None
+            try:
+                pixbuf = icon_info.load_icon()
+            except GLib.Error:
+                return None
+            _IconPreview._missing_icons[key] = pixbuf
+        return pixbuf
+
+    def do_draw(self, cr):
+        width = self.get_allocated_width()
+
+        pixbuf = self._get_pixbuf()
+        if pixbuf is not None:
+            # The surface is drawn at the pixbuf's own scale, to stay sharp.
+            surface = Gdk.cairo_surface_create_from_pixbuf(
+                pixbuf, self._pixbuf_scale, self.get_window())
+            # While resizing, the previous image is scaled to the new size.
+            scale = self._icon_size / self._pixbuf_size
+            image_width = pixbuf.get_width() / self._pixbuf_scale * scale
+            image_height = pixbuf.get_height() / self._pixbuf_scale * scale
+            cr.save()
+            cr.translate((width - image_width) // 2,
+                         (self._icon_size - image_height) // 2)
+            cr.scale(scale, scale)
+            cr.set_source_surface(surface, 0, 0)
+            cr.paint()
+            cr.restore()
+
+        caption_width = _IconPreview._caption_width // Pango.SCALE
+        Gtk.render_layout(self.get_style_context(), cr,
+                          (width - caption_width) // 2,
+                          self._icon_size + self.spacing,
+                          self._get_caption_layout())
+        return False
+
+    def do_get_accessible(self):
+        accessible = Gtk.DrawingArea.do_get_accessible(self)
+        if not self._accessible_named:
+            accessible.set_name(self._icon_name)
+            self._accessible_named = True
+        return accessible
+
+    def do_get_preferred_height(self):
+        height = self._icon_size + self.spacing + self._get_caption_height()
+        return height, height
+
+    def do_get_preferred_width(self):
+        self._update_caption_font()
+        width = max(self._icon_size,
+                    _IconPreview._caption_width // Pango.SCALE)
+        return width, width
+
+    def do_query_tooltip(self, x, y, keyboard_mode, tooltip):
+        if self._aliases:
+            tooltip.set_text(self._icon_name + "\nAlso: " +
+                             ", ".join(self._aliases))
+        else:
+            tooltip.set_text(self._icon_name)
+        return True
+
+    def get_aliases(self):
+        """Get the other names of the icon's image.
 
-        icon = Gtk.Image.new_from_icon_name(name, Gtk.IconSize.DIALOG)
-        # Gtk.Image.new_from_icon_name seems to sometimes ignore the set size,
-        #   leading to inconsistent icon sizes. Solution is to force a size
-        #   using set_pixel_size.
-        icon.set_pixel_size(size)
-        icon.set_tooltip_text(self._icon_name)
-
-        label = Gtk.Label(self._display_name)
-        label.set_justify(Gtk.Justification.CENTER)
-        label.set_lines(3)
-        label.set_line_wrap(True)
-        label.set_line_wrap_mode(Pango.WrapMode.WORD_CHAR)
-        label.set_max_width_chars(8)
-        label.set_ellipsize(Pango.EllipsizeMode.END)
-        label.set_yalign(0.5)
-
-        self.pack_start(icon, False, False, 0)
-        self.pack_start(label, False, False, 0)
+        :return: List of alias names.
+        """
+        return self._aliases
+
+    def get_icon_size(self):
+        """Get the size of the icon.
+
+        :return: Size of the icon, in pixels.
+        """
+        return self._icon_size
 
     def get_name(self):
         """Get the name of the icon.
@@ -753,3 +2359,31 @@ class _IconPreview(Gtk.Box):
         :return: Name of the icon.
         """
         return self._icon_name
+
+    def set_icon_size(self, size):
+        """Resize the icon in place.
+
+        The current image is drawn scaled to the new size until one of the new
+        size is given, using set_pixbuf.
+
+        :param size: Size of the icon, in pixels.
+        :return: None
+        """
+        self._icon_size = size
+        self.queue_resize()
+        # Resizing alone does not redraw if the allocation is unchanged.
+        self.queue_draw()
+
+    def set_pixbuf(self, pixbuf, scale):
+        """Set the image of the icon, loaded at its current size.
+
+        :param pixbuf: GdkPixbuf.Pixbuf of the icon, or None if it could not
+            be loaded.
+        :param scale: Scale factor the icon was loaded for.
+        :return: None
+        """
+        self._pixbuf = pixbuf
+        self._pixbuf_size = self._icon_size
+        self._pixbuf_scale = scale
+        self._loaded = True
+        self.queue_draw()